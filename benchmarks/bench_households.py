@@ -0,0 +1,134 @@
+# bench_households.py - Latência das rotas conforme o número de casas cresce
+#
+# Uso: python benchmarks/bench_households.py [--households 1,10,100,1000] [--requests 200]
+#
+# Cada casa tem 5 usuários e 56 tarefas, como os dados iniciais. As rotas são
+# chamadas sempre como um usuário da primeira casa; com os índices por casa a
+# latência deve ficar estável mesmo com o banco crescendo.
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from flask import Flask
+from sqlalchemy import insert
+from werkzeug.security import generate_password_hash
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import db, init_database, Household, User, Task  # noqa: E402
+from group_commit import init_group_commit  # noqa: E402
+from routes import api, create_auth_token  # noqa: E402
+
+DAYS = ['Segunda', 'Terça', 'Quarta', 'Quinta', 'Sexta', 'Sábado', 'Domingo']
+TASKS = ['Lavar a louça', 'Limpar o fogão', 'Limpar o chão', 'Lavar o banheiro',
+         'Estender a roupa', 'Colocar roupa na máquina', 'Tirar o lixo', 'Varrer a casa']
+USERS_PER_HOUSEHOLD = 5
+ROUTES = ['/api/users', '/api/tasks', '/api/tasks?day=Quarta', '/api/ranking', '/api/stats']
+
+def create_bench_app(database_url, **config):
+    """Cria uma aplicação mínima apontando para o banco de benchmark"""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = database_url
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['SECRET_KEY'] = 'bench-secret-key'
+    app.config.update(config)
+    init_database(app)
+    init_group_commit(app)
+    app.register_blueprint(api, url_prefix='/api')
+    return app
+
+def add_households(start, stop, password_hash):
+    """Insere as casas de start até stop (exclusivo) em lote"""
+    households, users, tasks = [], [], []
+    
+    for household_id in range(start, stop):
+        households.append({'id': household_id, 'name': f'Casa {household_id}'})
+        first_user_id = (household_id - 1) * USERS_PER_HOUSEHOLD + 1
+        
+        for offset in range(USERS_PER_HOUSEHOLD):
+            users.append({
+                'id': first_user_id + offset,
+                'household_id': household_id,
+                'name': f'Usuário {first_user_id + offset}',
+                'username': f'user{first_user_id + offset}',
+                'password_hash': password_hash,
+                'avatar_color': 'bg-sky-500',
+            })
+        
+        for day_index, day in enumerate(DAYS):
+            for task_index, task_name in enumerate(TASKS):
+                assigned = first_user_id + (day_index + task_index) % USERS_PER_HOUSEHOLD
+                completed = (day_index + task_index) % 2 == 0
+                tasks.append({
+                    'household_id': household_id,
+                    'day': day,
+                    'task_name': task_name,
+                    'points': 1 + task_index % 3,
+                    'assigned_user_id': assigned,
+                    'is_completed': completed,
+                    'completed_by_user_id': assigned if completed else None,
+                })
+    
+    db.session.execute(insert(Household), households)
+    db.session.execute(insert(User), users)
+    db.session.execute(insert(Task), tasks)
+    db.session.commit()
+
+def measure(client, token, route, requests):
+    """Retorna a mediana e o p95 da latência de uma rota, em milissegundos"""
+    headers = {'Authorization': f'Bearer {token}'}
+    client.get(route, headers=headers)  # aquecimento
+    
+    samples = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        response = client.get(route, headers=headers)
+        samples.append((time.perf_counter() - started) * 1000)
+        assert response.status_code == 200, response.get_json()
+    
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95) - 1]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--households', default='1,10,100,1000',
+                        help='Quantidades de casas a medir, separadas por vírgula')
+    parser.add_argument('--requests', type=int, default=200,
+                        help='Requisições por rota em cada medição')
+    parser.add_argument('--database-url', default=None,
+                        help='URL do banco (padrão: SQLite temporário)')
+    args = parser.parse_args()
+    
+    sizes = sorted(int(size) for size in args.households.split(','))
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        database_url = args.database_url or f"sqlite:///{os.path.join(tmpdir, 'bench.db')}"
+        app = create_bench_app(database_url)
+        
+        with app.app_context():
+            # Começar de um banco vazio (init_database cria a casa inicial)
+            db.drop_all()
+            db.create_all()
+            
+            password_hash = generate_password_hash('12345')
+            client = app.test_client()
+            current = 1
+            
+            print(f"{'casas':>7} {'rota':<24} {'mediana (ms)':>13} {'p95 (ms)':>10}")
+            for size in sizes:
+                add_households(current, size + 1, password_hash)
+                current = size + 1
+                
+                token = create_auth_token(db.session.get(User, 1))
+                for route in ROUTES:
+                    median, p95 = measure(client, token, route, args.requests)
+                    print(f"{size:>7} {route:<24} {median:>13.3f} {p95:>10.3f}")
+            
+            db.drop_all()
+
+if __name__ == '__main__':
+    main()
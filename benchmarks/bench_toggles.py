@@ -0,0 +1,108 @@
+# bench_toggles.py - Toggles por segundo com e sem group commit
+#
+# Uso: python benchmarks/bench_toggles.py [--threads 16] [--toggles 200]
+#                                         [--database-url postgresql://...]
+#
+# Sem --database-url o benchmark roda em um arquivo SQLite temporário. Para
+# medir no PostgreSQL, passe a URL de um banco descartável: as tabelas são
+# apagadas e recriadas. Cada thread simula um usuário de uma casa diferente
+# clicando em tarefas da própria casa, todas no mesmo processo (como o
+# servidor threaded do Flask).
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from werkzeug.security import generate_password_hash
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_households import create_bench_app, add_households, USERS_PER_HOUSEHOLD  # noqa: E402
+from database import db, User, Task  # noqa: E402
+from routes import create_auth_token  # noqa: E402
+
+def run(database_url, group_commit, threads, toggles):
+    """Executa a rajada de toggles e retorna (toggles por segundo, falhas)"""
+    app = create_bench_app(
+        database_url,
+        TOGGLE_GROUP_COMMIT=group_commit,
+        TOGGLE_GROUP_COMMIT_MAX_BATCH=32,
+        TOGGLE_GROUP_COMMIT_MAX_DELAY_MS=5,
+    )
+    
+    with app.app_context():
+        # Começar de um banco vazio com uma casa por thread
+        db.drop_all()
+        db.create_all()
+        add_households(1, threads + 1, generate_password_hash('12345'))
+        task_ids = {}
+        tokens = {}
+        for household_id in range(1, threads + 1):
+            task_ids[household_id] = [
+                task.id for task in Task.query.filter_by(household_id=household_id).all()
+            ]
+            user_id = (household_id - 1) * USERS_PER_HOUSEHOLD + 1
+            tokens[household_id] = create_auth_token(db.session.get(User, user_id))
+        db.session.remove()
+    
+    failures = []
+    start = threading.Barrier(threads + 1)
+    
+    def worker(household_id):
+        client = app.test_client()
+        user_id = (household_id - 1) * USERS_PER_HOUSEHOLD + 1
+        headers = {'Authorization': f'Bearer {tokens[household_id]}'}
+        tasks = task_ids[household_id]
+        start.wait()
+        for i in range(toggles):
+            response = client.post(
+                f'/api/tasks/{tasks[i % len(tasks)]}/toggle',
+                json={'user_id': user_id},
+                headers=headers,
+            )
+            if response.status_code != 200:
+                failures.append(response.get_json())
+    
+    workers = [threading.Thread(target=worker, args=(household_id,))
+               for household_id in range(1, threads + 1)]
+    for thread in workers:
+        thread.start()
+    
+    start.wait()
+    started = time.perf_counter()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    
+    with app.app_context():
+        db.drop_all()
+        db.engine.dispose()
+    
+    return threads * toggles / elapsed, len(failures)
+
+def main():
+    parser = argparse.ArgumentParser(description='Toggles por segundo com e sem group commit')
+    parser.add_argument('--threads', type=int, default=16,
+                        help='Requisições simultâneas (uma casa por thread)')
+    parser.add_argument('--toggles', type=int, default=200,
+                        help='Toggles feitos por cada thread')
+    parser.add_argument('--database-url', default=None,
+                        help='URL do banco (padrão: SQLite temporário)')
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmpdir:
+        database_url = args.database_url or f"sqlite:///{os.path.join(tmpdir, 'bench.db')}"
+        print(f"💾 Banco de dados: {database_url.split('@')[-1]}")
+        print(f"{'group commit':<14} {'toggles/s':>10} {'falhas':>7}")
+        
+        for group_commit in (False, True):
+            throughput, failures = run(database_url, group_commit, args.threads, args.toggles)
+            label = 'ligado' if group_commit else 'desligado'
+            print(f"{label:<14} {throughput:>10.1f} {failures:>7}")
+
+if __name__ == '__main__':
+    main()
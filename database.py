@@ -1,15 +1,37 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import inspect, text
 from werkzeug.security import generate_password_hash, check_password_hash
 from datetime import datetime
 
 # Inicializar SQLAlchemy
 db = SQLAlchemy()
 
+# Modelo de Casa (cada casa é um grupo isolado de usuários e tarefas)
+class Household(db.Model):
+    __tablename__ = 'households'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        """Converte a casa para dicionário (para JSON)"""
+        return {
+            'id': self.id,
+            'name': self.name,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
 # Modelo de Usuário
 class User(db.Model):
     __tablename__ = 'users'
+    # Índice começando pela casa: listar os usuários de uma casa não varre a tabela inteira
+    __table_args__ = (
+        db.Index('ix_users_household_id', 'household_id', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
+    household_id = db.Column(db.Integer, db.ForeignKey('households.id'), nullable=False)
     name = db.Column(db.String(100), nullable=False)
     username = db.Column(db.String(50), unique=True, nullable=False)
     password_hash = db.Column(db.String(255), nullable=False)
@@ -28,6 +50,7 @@ class User(db.Model):
         """Converte o usuário para dicionário (para JSON)"""
         return {
             'id': self.id,
+            'household_id': self.household_id,
             'name': self.name,
             'username': self.username,
             'avatar_color': self.avatar_color,
@@ -37,8 +60,15 @@ class User(db.Model):
 # Modelo de Tarefa
 class Task(db.Model):
     __tablename__ = 'tasks'
+    # Índices começando pela casa: as consultas de tarefas, ranking e estatísticas
+    # custam proporcional ao tamanho da casa, e não do banco inteiro
+    __table_args__ = (
+        db.Index('ix_tasks_household_day', 'household_id', 'day'),
+        db.Index('ix_tasks_household_completed', 'household_id', 'is_completed', 'completed_by_user_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
+    household_id = db.Column(db.Integer, db.ForeignKey('households.id'), nullable=False)
     day = db.Column(db.String(20), nullable=False)  # Segunda, Terça, etc.
     task_name = db.Column(db.String(200), nullable=False)
     points = db.Column(db.Integer, default=1)  # Pontos que a tarefa vale
@@ -52,10 +82,26 @@ class Task(db.Model):
     assigned_user = db.relationship('User', foreign_keys=[assigned_user_id], backref='assigned_tasks')
     completed_by_user = db.relationship('User', foreign_keys=[completed_by_user_id], backref='completed_tasks')
     
+    def toggle(self, user_id):
+        """Marca/desmarca a tarefa como concluída e retorna a mensagem para o usuário"""
+        if self.is_completed:
+            # Desmarcar como concluída
+            self.is_completed = False
+            self.completed_by_user_id = None
+            self.completed_at = None
+            return 'Tarefa desmarcada como concluída'
+        
+        # Marcar como concluída
+        self.is_completed = True
+        self.completed_by_user_id = user_id
+        self.completed_at = datetime.utcnow()
+        return 'Tarefa marcada como concluída'
+    
     def to_dict(self):
         """Converte a tarefa para dicionário (para JSON)"""
         return {
             'id': self.id,
+            'household_id': self.household_id,
             'day': self.day,
             'task_name': self.task_name,
             'points': self.points,
@@ -74,13 +120,62 @@ def init_database(app):
         # Criar todas as tabelas
         db.create_all()
         
+        # Bancos criados antes das casas não têm a coluna household_id
+        migrate_to_households()
+        
         # Verificar se já existem usuários, se não, criar dados iniciais
         if User.query.count() == 0:
             create_initial_data()
 
+def migrate_to_households():
+    """Adiciona household_id às tabelas antigas e move os dados para uma casa padrão"""
+    inspector = inspect(db.engine)
+    
+    household = None
+    for table in (User.__table__, Task.__table__):
+        columns = [column['name'] for column in inspector.get_columns(table.name)]
+        if 'household_id' in columns:
+            continue
+        
+        # Garantir que a casa padrão exista antes de apontar os dados para ela.
+        # O id vem do banco, para não deixar a sequence do PostgreSQL para trás
+        if household is None:
+            household = Household.query.order_by(Household.id).first()
+            if household is None:
+                household = Household(name='Lar Doce Lar')
+                db.session.add(household)
+                db.session.commit()
+        
+        # O DEFAULT preenche as linhas existentes com a casa padrão
+        db.session.execute(text(
+            f'ALTER TABLE {table.name} ADD COLUMN household_id INTEGER NOT NULL '
+            f'DEFAULT {int(household.id)} REFERENCES households (id)'
+        ))
+        
+        # Depois do preenchimento, novas linhas precisam informar a casa.
+        # O SQLite não remove DEFAULT sem recriar a tabela; lá o ORM sempre
+        # preenche household_id
+        if db.engine.dialect.name != 'sqlite':
+            db.session.execute(text(
+                f'ALTER TABLE {table.name} ALTER COLUMN household_id DROP DEFAULT'
+            ))
+        db.session.commit()
+        
+        # create_all não cria índices em tabelas que já existiam
+        for index in table.indexes:
+            index.create(db.engine, checkfirst=True)
+    
+    if household is not None:
+        print("✅ Dados existentes migrados para a casa padrão!")
+
 def create_initial_data():
     """Cria dados iniciais no banco"""
     
+    # Criar a casa inicial
+    household = Household(name='Lar Doce Lar')
+    db.session.add(household)
+    db.session.flush()
+    
     # Criar usuários iniciais
     users_data = [
         {'name': 'Igor', 'username': 'igor', 'password': '12345', 'avatar_color': 'bg-sky-500'},
@@ -93,6 +188,7 @@ def create_initial_data():
     users = []
     for user_data in users_data:
         user = User(
+            household_id=household.id,
             name=user_data['name'],
             username=user_data['username'],
             avatar_color=user_data['avatar_color']
@@ -185,10 +281,12 @@ def create_initial_data():
     
     for task_data in tasks_data:
         task = Task(
+            household_id=household.id,
             day=task_data['day'],
             task_name=task_data['task_name'],
             points=task_data['points'],
-            assigned_user_id=task_data['assigned_to']
+            # assigned_to é a posição do usuário na lista (1 a 5), não o id no banco
+            assigned_user_id=users[task_data['assigned_to'] - 1].id
         )
         db.session.add(task)
     
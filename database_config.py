@@ -1,6 +1,7 @@
 # database_config.py - Configuração para PostgreSQL na Render
 
 import os
+import secrets
 from urllib.parse import urlparse
 
 def get_database_url():
@@ -18,12 +19,27 @@ def get_database_url():
     # Ambiente local - continua usando SQLite
     return 'sqlite:///lar_doce_app.db'
 
+def get_secret_key():
+    """
+    Retorna a SECRET_KEY, que assina os tokens de login
+    """
+    secret_key = os.environ.get('SECRET_KEY')
+    if secret_key:
+        return secret_key
+    
+    # Sem SECRET_KEY qualquer um poderia forjar tokens: produção não sobe
+    if os.environ.get('RENDER'):
+        raise RuntimeError('SECRET_KEY é obrigatória em produção')
+    
+    # Ambiente local - chave aleatória (os logins expiram ao reiniciar)
+    return secrets.token_hex(32)
+
 def get_app_config():
     """
     Retorna configurações da aplicação baseadas no ambiente
     """
     config = {
-        'SECRET_KEY': os.environ.get('SECRET_KEY', 'lar-doce-app-secret-key-2024'),
+        'SECRET_KEY': get_secret_key(),
         'SQLALCHEMY_DATABASE_URI': get_database_url(),
         'SQLALCHEMY_TRACK_MODIFICATIONS': False,
         'JSON_SORT_KEYS': False,
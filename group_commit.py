@@ -0,0 +1,176 @@
+# group_commit.py - Gravação em lote (group commit) dos toggles de tarefas
+#
+# Sem group commit cada toggle faz o seu próprio commit. No SQLite todo commit
+# sincroniza o arquivo em disco e pega o lock de escrita do banco, então uma
+# rajada de toggles fica enfileirada, um commit de cada vez.
+#
+# Com TOGGLE_GROUP_COMMIT ativado, os toggles de um mesmo processo vão para uma
+# fila. Uma thread de fundo junta o que chegar em poucos milissegundos (ou até
+# o tamanho máximo do lote), aplica tudo em uma única transação e devolve a
+# cada requisição o seu próprio resultado. O ganho aparece quando o servidor
+# atende requisições em várias threads no mesmo processo.
+
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+from sqlalchemy.exc import OperationalError
+
+from database import db, User, Task
+
+def is_lock_error(error):
+    """Indica se o erro é o lock do SQLite, que garante que nada foi gravado"""
+    return isinstance(error, OperationalError) and 'database is locked' in str(error.orig)
+
+def apply_toggle(household_id, task_id, user_id):
+    """Aplica o toggle na sessão atual, sem commit, e retorna (resposta, status HTTP)"""
+    # Verificar se o usuário existe na casa
+    user = User.query.filter_by(household_id=household_id, id=user_id).first()
+    if not user:
+        return {'error': 'Usuário não encontrado'}, 404
+
+    # Buscar a tarefa
+    task = Task.query.filter_by(household_id=household_id, id=task_id).first()
+    if not task:
+        return {'error': 'Tarefa não encontrada'}, 404
+
+    message = task.toggle(user_id)
+
+    return {
+        'success': True,
+        'message': message,
+        'task': task.to_dict()
+    }, 200
+
+class ToggleBatcher:
+    """Fila de toggles gravados em lote por uma thread de fundo"""
+
+    def __init__(self, app, max_batch=32, max_delay=0.005, result_timeout=30):
+        self.app = app
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.result_timeout = result_timeout
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, household_id, task_id, user_id):
+        """Coloca um toggle na fila e retorna um Future com (resposta, status HTTP)"""
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((household_id, task_id, user_id, future))
+        return future
+
+    def toggle(self, household_id, task_id, user_id):
+        """Enfileira o toggle e espera o resultado, retornando (resposta, status HTTP)"""
+        future = self.submit(household_id, task_id, user_id)
+        try:
+            return future.result(timeout=self.result_timeout)
+        except FutureTimeoutError:
+            # Toggle não é idempotente: se ainda não foi gravado, ele é
+            # cancelado para que uma nova tentativa do cliente não o desfaça
+            if future.cancel():
+                return {'error': 'Tempo esgotado ao atualizar tarefa, tente novamente'}, 503
+
+        # O lote já está gravando este toggle: esperar o resultado, mas sem
+        # prender a requisição para sempre se o lote não terminar
+        try:
+            return future.result(timeout=self.result_timeout)
+        except FutureTimeoutError:
+            return {
+                'error': 'Tempo esgotado ao atualizar tarefa, recarregue as tarefas antes de tentar novamente'
+            }, 504
+
+    def _ensure_worker(self):
+        # A thread só é criada no primeiro toggle, já dentro do processo que
+        # atende as requisições (e não no processo pai antes de um fork)
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name='toggle-group-commit', daemon=True
+                )
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_delay
+
+            # Juntar o que chegar até o prazo ou até encher o lote
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            try:
+                self._flush(batch)
+            except Exception as e:
+                # Uma falha inesperada não pode matar a thread nem deixar
+                # requisições esperando por toggles que nunca vão terminar
+                self.app.logger.exception('Erro ao gravar lote de toggles')
+                for *_, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def _flush(self, batch):
+        """Aplica o lote em uma única transação e entrega o resultado de cada toggle"""
+        # Toggles cancelados por tempo esgotado não são aplicados
+        batch = [op for op in batch if op[-1].set_running_or_notify_cancel()]
+        if not batch:
+            return
+
+        with self.app.app_context():
+            try:
+                # Os toggles são aplicados na ordem de chegada, como se fossem
+                # commits separados; dois toggles na mesma tarefa se anulam
+                results = [
+                    apply_toggle(household_id, task_id, user_id)
+                    for household_id, task_id, user_id, _ in batch
+                ]
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                # Banco bloqueado não deve virar erro para todos: refazer um
+                # toggle por transação. Em outros erros o commit pode ter sido
+                # gravado (ex.: conexão caiu durante o COMMIT), e refazer
+                # inverteria as tarefas de novo
+                if is_lock_error(e):
+                    self._flush_one_by_one(batch)
+                else:
+                    for *_, future in batch:
+                        future.set_exception(e)
+                return
+
+        for (*_, future), result in zip(batch, results):
+            future.set_result(result)
+
+    def _flush_one_by_one(self, batch):
+        """Aplica cada toggle na sua própria transação, isolando as falhas"""
+        for household_id, task_id, user_id, future in batch:
+            try:
+                result = apply_toggle(household_id, task_id, user_id)
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+
+def init_group_commit(app):
+    """Ativa o group commit dos toggles se TOGGLE_GROUP_COMMIT estiver ligado"""
+    if not app.config.get('TOGGLE_GROUP_COMMIT'):
+        return
+
+    app.extensions['toggle_batcher'] = ToggleBatcher(
+        app,
+        max_batch=app.config.get('TOGGLE_GROUP_COMMIT_MAX_BATCH', 32),
+        max_delay=app.config.get('TOGGLE_GROUP_COMMIT_MAX_DELAY_MS', 5) / 1000,
+    )
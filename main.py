@@ -2,6 +2,8 @@ from flask import Flask
 from flask_cors import CORS
 import os
 from database import init_database
+from database_config import get_secret_key
+from group_commit import init_group_commit
 from routes import api
 
 def create_app():
@@ -11,7 +13,7 @@ def create_app():
     app = Flask(__name__)
     
     # Configurações da aplicação
-    app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'lar-doce-app-secret-key-2024')
+    app.config['SECRET_KEY'] = get_secret_key()
     
     # Configuração do banco de dados
     if os.environ.get('RENDER'):
@@ -28,6 +30,11 @@ def create_app():
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
     app.config['JSON_SORT_KEYS'] = False  # Manter ordem dos campos no JSON
     
+    # Group commit dos toggles (opcional): junta toggles em uma única transação
+    app.config['TOGGLE_GROUP_COMMIT'] = os.environ.get('TOGGLE_GROUP_COMMIT', '').lower() in ('1', 'true')
+    app.config['TOGGLE_GROUP_COMMIT_MAX_BATCH'] = int(os.environ.get('TOGGLE_GROUP_COMMIT_MAX_BATCH', 32))
+    app.config['TOGGLE_GROUP_COMMIT_MAX_DELAY_MS'] = float(os.environ.get('TOGGLE_GROUP_COMMIT_MAX_DELAY_MS', 5))
+    
     # Configurar CORS baseado no ambiente
     if os.environ.get('RENDER'):
         # Produção - permitir apenas domínios específicos
@@ -45,6 +52,9 @@ def create_app():
     # Inicializar o banco de dados
     init_database(app)
     
+    # Ativar o group commit dos toggles, se configurado
+    init_group_commit(app)
+    
     # Registrar as rotas
     app.register_blueprint(api, url_prefix='/api')
     
@@ -1,10 +1,61 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, g, current_app
 from datetime import datetime
+from functools import wraps
+from itsdangerous import URLSafeTimedSerializer, BadSignature, SignatureExpired
+from sqlalchemy import func
 from database import db, User, Task
+from group_commit import apply_toggle
 
 # Criar blueprint para as rotas
 api = Blueprint('api', __name__)
 
+# --- ESCOPO POR CASA ---
+
+# Validade do token de login (7 dias)
+AUTH_TOKEN_MAX_AGE = 7 * 24 * 60 * 60
+
+def get_token_serializer():
+    """Serializador que assina os tokens de login com a SECRET_KEY"""
+    return URLSafeTimedSerializer(current_app.config['SECRET_KEY'], salt='auth-token')
+
+def create_auth_token(user):
+    """Gera o token assinado que identifica o usuário nas próximas requisições"""
+    return get_token_serializer().dumps({'user_id': user.id})
+
+def household_required(view):
+    """Identifica o usuário pelo token de login e limita a rota à casa dele"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        auth_header = request.headers.get('Authorization', '')
+        if not auth_header.startswith('Bearer '):
+            return jsonify({'error': 'Token de autenticação é obrigatório'}), 401
+        
+        try:
+            token_data = get_token_serializer().loads(
+                auth_header[len('Bearer '):], max_age=AUTH_TOKEN_MAX_AGE
+            )
+        except SignatureExpired:
+            return jsonify({'error': 'Token expirado, faça login novamente'}), 401
+        except BadSignature:
+            return jsonify({'error': 'Token inválido'}), 401
+        
+        current_user = db.session.get(User, token_data.get('user_id'))
+        if not current_user:
+            return jsonify({'error': 'Usuário não encontrado'}), 401
+        
+        g.current_user = current_user
+        g.household_id = current_user.household_id
+        return view(*args, **kwargs)
+    return wrapper
+
+def get_household_user(user_id):
+    """Busca um usuário dentro da casa atual"""
+    return User.query.filter_by(household_id=g.household_id, id=user_id).first()
+
+def get_household_task(task_id):
+    """Busca uma tarefa dentro da casa atual"""
+    return Task.query.filter_by(household_id=g.household_id, id=task_id).first()
+
 # --- ROTAS DE AUTENTICAÇÃO ---
 
 @api.route('/login', methods=['POST'])
@@ -26,7 +77,9 @@ def login():
             return jsonify({
                 'success': True,
                 'message': 'Login realizado com sucesso',
-                'user': user.to_dict()
+                'user': user.to_dict(),
+                # Enviar nas próximas requisições como "Authorization: Bearer <token>"
+                'token': create_auth_token(user)
             }), 200
         else:
             return jsonify({'error': 'Credenciais inválidas'}), 401
@@ -37,10 +90,11 @@ def login():
 # --- ROTAS DE USUÁRIOS ---
 
 @api.route('/users', methods=['GET'])
+@household_required
 def get_users():
-    """Retorna todos os usuários"""
+    """Retorna todos os usuários da casa"""
     try:
-        users = User.query.all()
+        users = User.query.filter_by(household_id=g.household_id).all()
         return jsonify({
             'users': [user.to_dict() for user in users]
         }), 200
@@ -48,10 +102,11 @@ def get_users():
         return jsonify({'error': f'Erro ao buscar usuários: {str(e)}'}), 500
 
 @api.route('/users/<int:user_id>', methods=['GET'])
+@household_required
 def get_user(user_id):
     """Retorna um usuário específico"""
     try:
-        user = User.query.get(user_id)
+        user = get_household_user(user_id)
         if not user:
             return jsonify({'error': 'Usuário não encontrado'}), 404
         
@@ -62,15 +117,16 @@ def get_user(user_id):
 # --- ROTAS DE TAREFAS ---
 
 @api.route('/tasks', methods=['GET'])
+@household_required
 def get_tasks():
-    """Retorna todas as tarefas ou filtradas por dia"""
+    """Retorna todas as tarefas da casa ou filtradas por dia"""
     try:
         day = request.args.get('day')  # Parâmetro opcional para filtrar por dia
         
         if day:
-            tasks = Task.query.filter_by(day=day).all()
+            tasks = Task.query.filter_by(household_id=g.household_id, day=day).all()
         else:
-            tasks = Task.query.all()
+            tasks = Task.query.filter_by(household_id=g.household_id).all()
         
         return jsonify({
             'tasks': [task.to_dict() for task in tasks]
@@ -79,10 +135,11 @@ def get_tasks():
         return jsonify({'error': f'Erro ao buscar tarefas: {str(e)}'}), 500
 
 @api.route('/tasks/<int:task_id>', methods=['GET'])
+@household_required
 def get_task(task_id):
     """Retorna uma tarefa específica"""
     try:
-        task = Task.query.get(task_id)
+        task = get_household_task(task_id)
         if not task:
             return jsonify({'error': 'Tarefa não encontrada'}), 404
         
@@ -91,6 +148,7 @@ def get_task(task_id):
         return jsonify({'error': f'Erro ao buscar tarefa: {str(e)}'}), 500
 
 @api.route('/tasks/<int:task_id>/toggle', methods=['POST'])
+@household_required
 def toggle_task(task_id):
     """Marca/desmarca uma tarefa como concluída"""
     try:
@@ -100,43 +158,26 @@ def toggle_task(task_id):
         if not user_id:
             return jsonify({'error': 'user_id é obrigatório'}), 400
         
-        # Verificar se o usuário existe
-        user = User.query.get(user_id)
-        if not user:
-            return jsonify({'error': 'Usuário não encontrado'}), 404
-        
-        # Buscar a tarefa
-        task = Task.query.get(task_id)
-        if not task:
-            return jsonify({'error': 'Tarefa não encontrada'}), 404
-        
-        # Toggle da tarefa
-        if task.is_completed:
-            # Desmarcar como concluída
-            task.is_completed = False
-            task.completed_by_user_id = None
-            task.completed_at = None
-            message = 'Tarefa desmarcada como concluída'
+        batcher = current_app.extensions.get('toggle_batcher')
+        if batcher:
+            # Devolver a conexão ao pool antes de esperar, senão as requisições
+            # paradas na fila podem ocupar todas as conexões que o lote precisa
+            db.session.close()
+            
+            # Group commit: o toggle entra na fila e é gravado junto com outros
+            payload, status = batcher.toggle(g.household_id, task_id, user_id)
         else:
-            # Marcar como concluída
-            task.is_completed = True
-            task.completed_by_user_id = user_id
-            task.completed_at = datetime.utcnow()
-            message = 'Tarefa marcada como concluída'
-        
-        db.session.commit()
+            payload, status = apply_toggle(g.household_id, task_id, user_id)
+            db.session.commit()
         
-        return jsonify({
-            'success': True,
-            'message': message,
-            'task': task.to_dict()
-        }), 200
+        return jsonify(payload), status
         
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': f'Erro ao atualizar tarefa: {str(e)}'}), 500
 
 @api.route('/tasks', methods=['POST'])
+@household_required
 def create_task():
     """Cria uma nova tarefa"""
     try:
@@ -148,12 +189,13 @@ def create_task():
                 return jsonify({'error': f'{field} é obrigatório'}), 400
         
         # Verificar se o usuário existe
-        user = User.query.get(data['assigned_user_id'])
+        user = get_household_user(data['assigned_user_id'])
         if not user:
             return jsonify({'error': 'Usuário não encontrado'}), 404
         
         # Criar nova tarefa
         task = Task(
+            household_id=g.household_id,
             day=data['day'],
             task_name=data['task_name'],
             assigned_user_id=data['assigned_user_id']
@@ -173,12 +215,13 @@ def create_task():
         return jsonify({'error': f'Erro ao criar tarefa: {str(e)}'}), 500
 
 @api.route('/tasks/<int:task_id>', methods=['PUT'])
+@household_required
 def update_task(task_id):
     """Atualiza uma tarefa existente"""
     try:
         data = request.get_json()
         
-        task = Task.query.get(task_id)
+        task = get_household_task(task_id)
         if not task:
             return jsonify({'error': 'Tarefa não encontrada'}), 404
         
@@ -189,7 +232,7 @@ def update_task(task_id):
             task.task_name = data['task_name']
         if 'assigned_user_id' in data:
             # Verificar se o usuário existe
-            user = User.query.get(data['assigned_user_id'])
+            user = get_household_user(data['assigned_user_id'])
             if not user:
                 return jsonify({'error': 'Usuário não encontrado'}), 404
             task.assigned_user_id = data['assigned_user_id']
@@ -207,10 +250,11 @@ def update_task(task_id):
         return jsonify({'error': f'Erro ao atualizar tarefa: {str(e)}'}), 500
 
 @api.route('/tasks/<int:task_id>', methods=['DELETE'])
+@household_required
 def delete_task(task_id):
     """Deleta uma tarefa"""
     try:
-        task = Task.query.get(task_id)
+        task = get_household_task(task_id)
         if not task:
             return jsonify({'error': 'Tarefa não encontrada'}), 404
         
@@ -229,24 +273,30 @@ def delete_task(task_id):
 # --- ROTAS DE ESTATÍSTICAS ---
 
 @api.route('/ranking', methods=['GET'])
+@household_required
 def get_ranking():
-    """Retorna o ranking de usuários por pontuação"""
+    """Retorna o ranking de usuários da casa por pontuação"""
     try:
-        # Buscar todas as tarefas concluídas
-        completed_tasks = Task.query.filter_by(is_completed=True).all()
+        # Somar pontos e tarefas concluídas por usuário direto no banco
+        totals = db.session.query(
+            Task.completed_by_user_id,
+            func.coalesce(func.sum(Task.points), 0),
+            func.count(Task.id)
+        ).filter(
+            Task.household_id == g.household_id,
+            Task.is_completed.is_(True),
+            Task.completed_by_user_id.isnot(None)
+        ).group_by(Task.completed_by_user_id).all()
         
-        # Calcular pontos por usuário
         user_points = {}
         user_tasks_count = {}
         
-        for task in completed_tasks:
-            completed_by_id = task.completed_by_user_id
-            if completed_by_id:
-                user_points[completed_by_id] = user_points.get(completed_by_id, 0) + task.points
-                user_tasks_count[completed_by_id] = user_tasks_count.get(completed_by_id, 0) + 1
+        for completed_by_id, points, tasks_count in totals:
+            user_points[completed_by_id] = points
+            user_tasks_count[completed_by_id] = tasks_count
         
         # Buscar dados dos usuários e criar ranking
-        users = User.query.all()
+        users = User.query.filter_by(household_id=g.household_id).all()
         ranking = []
         
         for user in users:
@@ -278,20 +328,21 @@ def get_ranking():
         return jsonify({'error': f'Erro ao buscar ranking: {str(e)}'}), 500
 
 @api.route('/stats', methods=['GET'])
+@household_required
 def get_stats():
-    """Retorna estatísticas gerais"""
+    """Retorna estatísticas gerais da casa"""
     try:
-        total_tasks = Task.query.count()
-        completed_tasks = Task.query.filter_by(is_completed=True).count()
-        total_users = User.query.count()
+        total_tasks = Task.query.filter_by(household_id=g.household_id).count()
+        completed_tasks = Task.query.filter_by(household_id=g.household_id, is_completed=True).count()
+        total_users = User.query.filter_by(household_id=g.household_id).count()
         
         # Estatísticas por dia
         days = ['Segunda', 'Terça', 'Quarta', 'Quinta', 'Sexta', 'Sábado', 'Domingo']
         stats_by_day = {}
         
         for day in days:
-            day_tasks = Task.query.filter_by(day=day).count()
-            day_completed = Task.query.filter_by(day=day, is_completed=True).count()
+            day_tasks = Task.query.filter_by(household_id=g.household_id, day=day).count()
+            day_completed = Task.query.filter_by(household_id=g.household_id, day=day, is_completed=True).count()
             stats_by_day[day] = {
                 'total': day_tasks,
                 'completed': day_completed,